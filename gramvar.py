@@ -0,0 +1,132 @@
+import argparse
+import importlib.util
+import re
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parent
+
+# command -> (script, description)
+COMMANDS: Dict[str, Tuple[str, str]] = {
+    "analyze-chapters": (
+        "scripts/analyze_chapters.py",
+        "count categories, chapters, explanations and keywords",
+    ),
+    "analyze-spreadsheets": (
+        "scripts/analyze_spreadsheets.py",
+        "count categories and keywords",
+    ),
+    "check-grammars": (
+        "scripts/check_grammars.py",
+        "check spreadsheets for unrecognized values",
+    ),
+    "search": ("scripts/word_search.py", "search converted grammars for keywords"),
+    "plot": ("plotting/plot.py", "plot variation counts"),
+    "pdf2json": ("server/pdf2json.py", "convert PDFs to JSON (or run the server)"),
+    "pages": (
+        "server/page_archive.py",
+        "convert between JSON page arrays and page archives",
+    ),
+}
+
+# Modules that must not be loaded just to start a command or print its help.
+HEAVY_MODULES = ("pandas", "numpy", "matplotlib", "pdftotext")
+
+# Budget for the cumulative import time of `gramvar.py <command> --help`.
+STARTUP_BUDGET_MS = 150.0
+
+
+def load(command: str):
+    """Import the module implementing `command` from its script."""
+    script = ROOT / COMMANDS[command][0]
+    # Let the script import its siblings, as it would when run directly.
+    sys.path.insert(0, str(script.parent))
+    spec = importlib.util.spec_from_file_location(script.stem, script)
+    assert spec is not None and spec.loader is not None
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[script.stem] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def import_times(command: str) -> Tuple[float, List[str]]:
+    """Run `command --help` under `-X importtime`.
+
+    Returns the total import time in milliseconds and the modules imported.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", __file__, command, "--help"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    total_us = 0
+    modules = []
+    for line in proc.stderr.splitlines():
+        match = re.match(r"import time:\s*(\d+) \|\s*\d+ \|( *)(\S+)", line)
+        if match is not None:
+            total_us += int(match.group(1))
+            modules.append(match.group(3))
+    return total_us / 1000, modules
+
+
+def startup_check(budget: float) -> bool:
+    ok = True
+    for command in COMMANDS:
+        total, modules = import_times(command)
+        heavy = sorted({mod for mod in modules if mod.split(".")[0] in HEAVY_MODULES})
+        status = "ok"
+        if heavy:
+            status = f"imports {', '.join(heavy)}"
+            ok = False
+        elif total > budget:
+            status = "over budget"
+            ok = False
+        print(f"{command:<22}{total:8.1f} ms  {status}")
+    return ok
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Tools for our research on variation in grammars.",
+        epilog="commands:\n"
+        + "\n".join(f"  {cmd:<22}{desc}" for cmd, (_, desc) in COMMANDS.items())
+        + f"\n  {'startup-check':<22}check that every command starts quickly"
+        + "\n\nRun `%(prog)s COMMAND --help` for the options of each command.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "command",
+        choices=[*COMMANDS, "startup-check"],
+        metavar="COMMAND",
+        help="command to run",
+    )
+    parser.add_argument(
+        "args",
+        nargs=argparse.REMAINDER,
+        help="arguments for the command",
+    )
+    args = parser.parse_args(argv)
+
+    if args.command == "startup-check":
+        check = argparse.ArgumentParser(
+            prog=f"{parser.prog} startup-check",
+            description="Check the import time of every command's --help.",
+        )
+        check.add_argument(
+            "--budget",
+            type=float,
+            default=STARTUP_BUDGET_MS,
+            help="maximum import time in milliseconds (default %(default)s)",
+        )
+        sys.exit(0 if startup_check(check.parse_args(args.args).budget) else 1)
+
+    # Make the command's usage read `gramvar.py COMMAND ...`.
+    sys.argv = [f"{parser.prog} {args.command}", *args.args]
+    load(args.command).main()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,15 @@
+import argparse
 import json
-import sys
+import os
 from collections import defaultdict as ddict
-from typing import Any, DefaultDict, Dict, Set, Tuple
-
-import matplotlib.pyplot as plt  # type: ignore
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, DefaultDict, Dict, FrozenSet, List, NamedTuple, Optional, Tuple
 
 DATA1 = Tuple[Tuple[str, ...], Tuple[int, ...]]
-DATA2 = Tuple[Tuple[str, ...], Tuple[float, ...], Tuple[float, ...]]
+# Explanation labels, and the percentage per explanation for each group
+DATA2 = Tuple[Tuple[str, ...], Dict[str, Tuple[float, ...]]]
 
 FIG_TITLE1 = "Fig 1: Types of Variation (All Grammars)"
 FIG_TITLE2 = "Fig 2: Phonetic/Phonological vs. Syntactic : Explanations"
@@ -18,140 +21,369 @@ SYN_CATS = {
     "syntactic",
 }
 
+# Bar colors for the groups of an explanations figure, in order.
+GROUP_COLORS = ("blue", "orange", "green", "red", "purple", "brown", "gray")
+
+# Figure specs are matched against the top-level scope `totals` or a
+# spreadsheet name from `categories.spreadsheets`. `*` renders one figure per
+# spreadsheet.
+ALL_SHEETS = "*"
+
+
+class FigureSpec(NamedTuple):
+    # Output file stem
+    name: str
+    # "categories" (count per category) or "explanations" (percentage of each
+    # explanation within each group of categories)
+    kind: str
+    # May contain `{scope}`, which is replaced by the spreadsheet name
+    title: str
+    # Group label -> categories in the group (explanations figures only)
+    groups: Dict[str, FrozenSet[str]] = {}
+    scope: str = "totals"
+    # Group label -> legend text (defaults to "<label> Category")
+    legends: Dict[str, str] = {}
+
+    @staticmethod
+    def from_dict(spec: Dict[str, Any]) -> "FigureSpec":
+        if spec["kind"] not in ("categories", "explanations"):
+            raise ValueError(f"Unknown figure kind: {spec['kind']}")
+        groups = {lbl: frozenset(cats) for lbl, cats in spec.get("groups", {}).items()}
+        if spec["kind"] == "explanations" and not groups:
+            raise ValueError(f"Figure {spec['name']} needs category groups")
+        return FigureSpec(
+            spec["name"],
+            spec["kind"],
+            spec["title"],
+            groups,
+            spec.get("scope", "totals"),
+            spec.get("legends", {}),
+        )
+
+
+DEFAULT_SPECS = [
+    FigureSpec("fig1", "categories", FIG_TITLE1),
+    FigureSpec(
+        "fig2",
+        "explanations",
+        FIG_TITLE2,
+        {"Phonology": frozenset(PHON_CATS), "Syntax": frozenset(SYN_CATS)},
+        legends={"Syntax": "Syntactic Category"},
+    ),
+]
+
+
+class Aggregate(NamedTuple):
+    # (category, count), most frequent first
+    counts: List[Tuple[str, int]]
+    # Category group -> explanation -> count
+    explanations: Dict[FrozenSet[str], DefaultDict[str, int]]
+
+
+class RenderTask(NamedTuple):
+    kind: str
+    data: Any
+    title: str
+    outfile: Path
+    legends: Dict[str, str] = {}
+    all_caps: bool = True
+
+
+@lru_cache(maxsize=None)
+def pyplot() -> Any:
+    # NOTE: matplotlib is slow to import, so only load it once we actually
+    # draw something, and pick the non-interactive backend before pyplot is
+    # first imported.
+    import matplotlib  # type: ignore
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt  # type: ignore
+
+    # Formatting defaults
+    plt.rcdefaults()
+    plt.rcParams["font.family"] = "sans-serif"
+    plt.rcParams["xtick.labelcolor"] = "#555555"
+    plt.rcParams["text.color"] = "#555555"
+    plt.rcParams["axes.titlecolor"] = "#000000"
+    return plt
+
 
 def caps(txt: str, all_caps: bool) -> str:
     return txt.upper() if all_caps else txt
 
 
-def counts_by_expl(
-    data: Dict[str, Any],
-    cat_set: Set[str],
-) -> Tuple[Tuple[str, ...], Tuple[float, ...]]:
-    expl_cnts: DefaultDict[str, int] = ddict(int)
-    for cat, cnts in data.items():
-        if cat in cat_set:
-            for expl, cnt in cnts["explanations for variation"].items():
-                expl_cnts[expl] += cnt
-    lbls, cnts = zip(*sorted(expl_cnts.items()))
-    cnts = [100 * (cnt / sum(cnts)) for cnt in cnts]
-    return lbls, cnts
+def load_specs(path: Path) -> List[FigureSpec]:
+    with open(path, encoding="utf8") as f:
+        return [FigureSpec.from_dict(spec) for spec in json.load(f)]
 
 
-def data1(data: Dict[str, Any]) -> DATA1:
-    # Assumes counts are already sorted
-    cat_cnts = [
-        (cat, cnts["count"]) for cat, cnts in data.items() if cat != "uncategorized"
-    ]
+def scopes_for(spec: FigureSpec, sheets: List[str]) -> List[str]:
+    if spec.scope == ALL_SHEETS:
+        return sheets
+    return [spec.scope]
+
+
+def aggregate(
+    data: Dict[str, Any],
+    specs: List[FigureSpec],
+) -> Dict[str, Aggregate]:
+    """Compute everything `specs` need with a single pass over each scope."""
+    sheets = data["categories"]["spreadsheets"]
+    for spec in specs:
+        if spec.scope not in ("totals", ALL_SHEETS, *sheets):
+            raise ValueError(f"Figure {spec.name}: no spreadsheet {spec.scope!r}")
+    wanted = {scope for spec in specs for scope in scopes_for(spec, sorted(sheets))}
+    groups = {group for spec in specs for group in spec.groups.values()}
+    groups_by_cat: DefaultDict[str, List[FrozenSet[str]]] = ddict(list)
+    for group in groups:
+        for cat in group:
+            groups_by_cat[cat].append(group)
+
+    aggs = {}
+    for scope in wanted:
+        cats = data["categories"]["totals"] if scope == "totals" else sheets[scope]
+        agg = Aggregate([], {group: ddict(int) for group in groups})
+        for cat, cnts in cats.items():
+            agg.counts.append((cat, cnts["count"]))
+            for group in groups_by_cat.get(cat, []):
+                expl_cnts = agg.explanations[group]
+                for expl, cnt in cnts["explanations for variation"].items():
+                    expl_cnts[expl] += cnt
+        agg.counts.sort(key=lambda item: item[1], reverse=True)
+        aggs[scope] = agg
+    return aggs
+
+
+def data1(agg: Aggregate) -> DATA1:
+    cat_cnts = [(cat, cnt) for cat, cnt in agg.counts if cat != "uncategorized"]
     lbls, cnts = zip(*cat_cnts)
     return lbls, cnts
 
 
-def data2(data: Dict[str, Any]) -> DATA2:
-    lbls, phon_cnts = counts_by_expl(data, PHON_CATS)
-    _syn_lbls, syn_cnts = counts_by_expl(data, SYN_CATS)
-    assert lbls == _syn_lbls
-    return lbls, phon_cnts, syn_cnts
+def data2(agg: Aggregate, groups: Dict[str, FrozenSet[str]]) -> DATA2:
+    expls = sorted(
+        {expl for group in groups.values() for expl in agg.explanations[group]}
+    )
+    pcts = {}
+    for lbl, group in groups.items():
+        expl_cnts = agg.explanations[group]
+        total = sum(expl_cnts.values()) or 1
+        pcts[lbl] = tuple(100 * (expl_cnts.get(expl, 0) / total) for expl in expls)
+    return tuple(expls), pcts
 
 
-def plot1(data: DATA1, outfile: str, all_caps=True) -> None:
+def plot1(data: DATA1, title: str, outfile: Path, all_caps=True) -> None:
     lbls, cnts = data
 
     # Initialize graph
+    plt = pyplot()
     fig, ax = plt.subplots()
+    try:
+        # Graph title
+        ax.set_title(caps(title, all_caps))
 
-    # Graph title
-    ax.set_title(caps(FIG_TITLE1, all_caps))
-
-    # Turn off border and y axis
-    ax.set_frame_on(False)
-    ax.yaxis.set_visible(False)
+        # Turn off border and y axis
+        ax.set_frame_on(False)
+        ax.yaxis.set_visible(False)
 
-    # Bar chart
-    bar = ax.bar(lbls, cnts, width=0.5, color="blue")
+        # Bar chart
+        bar = ax.bar(lbls, cnts, width=0.5, color="blue")
 
-    # Display count on each bar
-    ax.bar_label(bar, padding=5, rotation=90)
+        # Display count on each bar
+        ax.bar_label(bar, padding=5, rotation=90)
 
-    # Set x axis labels
-    ax.set_xticklabels([caps(lbl, all_caps) for lbl in lbls])
+        # Set x axis labels
+        ax.set_xticks(range(len(lbls)))
+        ax.set_xticklabels([caps(lbl, all_caps) for lbl in lbls])
 
-    # Angle labels
-    fig.autofmt_xdate(rotation=45)
+        # Angle labels
+        fig.autofmt_xdate(rotation=45)
 
-    # Save to file
-    fig.savefig(outfile, bbox_inches="tight")
+        # Save to file
+        fig.savefig(outfile, bbox_inches="tight")
+    finally:
+        plt.close(fig)
 
 
-def plot2(data: DATA2, outfile: str, all_caps=True) -> None:
-    lbls, phon_cnts, syn_cnts = data
+def plot2(
+    data: DATA2,
+    title: str,
+    outfile: Path,
+    all_caps=True,
+    legends: Optional[Dict[str, str]] = None,
+) -> None:
+    lbls, pcts = data
 
-    bar_width = 0.6
     gap = 0.4
-    phon_lbls = [x * (1 + gap) for x in range(len(lbls))]
-    syn_lbls = [(x * (1 + gap)) + bar_width for x in range(len(lbls))]
+    bar_width = 1.2 / len(pcts)
 
+    plt = pyplot()
     fig, ax = plt.subplots()
-    ax.set_title(caps(FIG_TITLE2, all_caps))
-    ax.set_frame_on(False)
-    ax.yaxis.set_visible(False)
-
-    phon_bar = ax.bar(
-        phon_lbls,
-        phon_cnts,
-        width=bar_width,
-        color="blue",
-        label="Phonology Category",
+    try:
+        ax.set_title(caps(title, all_caps))
+        ax.set_frame_on(False)
+        ax.yaxis.set_visible(False)
+
+        for ind, (group, group_pcts) in enumerate(pcts.items()):
+            bar = ax.bar(
+                [(x * (1 + gap)) + ind * bar_width for x in range(len(lbls))],
+                group_pcts,
+                width=bar_width,
+                color=GROUP_COLORS[ind % len(GROUP_COLORS)],
+                label=(legends or {}).get(group, f"{group} Category"),
+            )
+            ax.bar_label(bar, fmt="%.2f", padding=5, rotation=90)
+        offset = (len(pcts) - 1) * bar_width / 2
+        ax.set_xticks([(x * (1 + gap)) + offset for x in range(len(lbls))])
+        ax.set_xticklabels([caps(lbl, all_caps) for lbl in lbls])
+        fig.autofmt_xdate(rotation=45)
+
+        ax.legend()
+
+        fig.savefig(outfile, bbox_inches="tight")
+    finally:
+        plt.close(fig)
+
+
+def write_csv(task: RenderTask) -> None:
+    outfile = task.outfile.with_suffix(".csv")
+    if task.kind == "categories":
+        head = "Variation,Count"
+        rows = [f"{lbl},{cnt}" for lbl, cnt in zip(*task.data)]
+    else:
+        lbls, pcts = task.data
+        head = ",".join(["Explanation", *(f"{group} (%)" for group in pcts)])
+        rows = [
+            ",".join([lbl, *(str(cnts[ind]) for cnts in pcts.values())])
+            for ind, lbl in enumerate(lbls)
+        ]
+    with open(outfile, "w", encoding="utf8") as f:
+        f.write(head + "\n" + "\n".join(rows) + "\n")
+
+
+def render(task: RenderTask) -> None:
+    if task.kind == "categories":
+        plot1(task.data, task.title, task.outfile, task.all_caps)
+    else:
+        plot2(task.data, task.title, task.outfile, task.all_caps, task.legends)
+
+
+def plan(
+    data: Dict[str, Any],
+    specs: List[FigureSpec],
+    out_dir: Path,
+) -> List[RenderTask]:
+    aggs = aggregate(data, specs)
+    sheets = sorted(data["categories"]["spreadsheets"])
+    tasks = []
+    for spec in specs:
+        for scope in scopes_for(spec, sheets):
+            name = spec.name
+            if spec.scope == ALL_SHEETS:
+                name += "-" + Path(scope).stem
+            if spec.kind == "categories":
+                fig_data: Any = data1(aggs[scope])
+            else:
+                fig_data = data2(aggs[scope], spec.groups)
+            tasks.append(
+                RenderTask(
+                    spec.kind,
+                    fig_data,
+                    spec.title.format(scope=Path(scope).stem),
+                    out_dir / f"{name}.png",
+                    spec.legends,
+                )
+            )
+    return tasks
+
+
+def output_dirs(paths: List[Path], root: Path) -> List[Path]:
+    """One output directory per data file, named after its path relative to
+    the deepest directory shared by all of them.
+    """
+    if len(paths) == 1:
+        return [root]
+    resolved = [path.resolve().with_suffix("") for path in paths]
+    common = Path(os.path.commonpath([path.parent for path in resolved]))
+    return [root / path.relative_to(common) for path in resolved]
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Plot variation counts.")
+    parser.add_argument(
+        "data",
+        type=Path,
+        nargs="+",
+        help="JSON output of analyze_chapters.py",
     )
-    syn_bar = ax.bar(
-        syn_lbls,
-        syn_cnts,
-        width=bar_width,
-        color="orange",
-        label="Syntactic Category",
+    parser.add_argument(
+        "-s",
+        "--specs",
+        type=Path,
+        help="JSON list of figure specs (defaults to fig1 and fig2)",
     )
-    ax.bar_label(phon_bar, fmt="%.2f", padding=5, rotation=90)
-    ax.bar_label(syn_bar, fmt="%.2f", padding=5, rotation=90)
-    ax.set_xticks([(x * (1 + gap)) + bar_width / 2 for x in range(len(lbls))])
-    ax.set_xticklabels([caps(lbl, all_caps) for lbl in lbls])
-    fig.autofmt_xdate(rotation=45)
-
-    ax.legend()
-
-    fig.savefig(outfile, bbox_inches="tight")
-
-
-if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        sys.exit(f"Usage: {sys.argv[0]} DATA.JSON")
-    with open(sys.argv[1], encoding="utf8") as f:
-        data = json.load(f)
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=Path,
+        default=Path("."),
+        help="directory to write figures to; with several data files, each"
+        " gets its own subdirectory named after its path (defaults to the"
+        " current directory)",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        help="number of figures to render in parallel (defaults to CPU count)",
+    )
+    parser.add_argument(
+        "--csv-only",
+        action="store_true",
+        help="only write the CSV files (skips loading matplotlib)",
+    )
+    args = parser.parse_args(argv)
 
-    # Formatting defaults
-    plt.rcdefaults()
-    plt.rcParams["font.family"] = "sans-serif"
-    plt.rcParams["xtick.labelcolor"] = "#555555"
-    plt.rcParams["text.color"] = "#555555"
-    plt.rcParams["axes.titlecolor"] = "#000000"
+    specs = DEFAULT_SPECS if args.specs is None else load_specs(args.specs)
+    if len({path.resolve() for path in args.data}) != len(args.data):
+        parser.error("the same data file was given more than once")
 
     # Compute data
-    data = data["categories"]["totals"]
-    d1 = data1(data)
-    d2 = data2(data)
+    tasks = []
+    out_dirs = output_dirs(args.data, args.output)
+    for path, out_dir in zip(args.data, out_dirs):
+        with open(path, encoding="utf8") as f:
+            data = json.load(f)
+        try:
+            tasks.extend(plan(data, specs, out_dir))
+        except ValueError as e:
+            parser.error(f"{path}: {e}")
+    outfiles = set()
+    for task in tasks:
+        if task.outfile in outfiles:
+            parser.error(f"more than one figure would be written to {task.outfile}")
+        outfiles.add(task.outfile)
+    for out_dir in out_dirs:
+        out_dir.mkdir(parents=True, exist_ok=True)
+
+    # Write CSV
+    for task in tasks:
+        write_csv(task)
 
     # Plot data
-    plot1(d1, "fig1.png")
-    plot2(d2, "fig2.png")
+    if args.csv_only:
+        return
+    if len(tasks) == 1 or args.jobs == 1:
+        for task in tasks:
+            render(task)
+        return
+    # NOTE: Each worker loads matplotlib once up front and reuses it for all
+    # of its figures.
+    workers = min(args.jobs or os.cpu_count() or 1, len(tasks))
+    with ProcessPoolExecutor(workers, initializer=pyplot) as pool:
+        for _ in pool.map(render, tasks):
+            pass
 
-    # Write CSV
-    with open("fig1.csv", "w", encoding="utf8") as f:
-        f.write(
-            "Variation,Count\n"
-            + "\n".join(f"{lbl},{cnt}" for lbl, cnt in zip(*d1))
-            + "\n"
-        )
-    with open("fig2.csv", "w", encoding="utf8") as f:
-        f.write(
-            "Explanation,Phonology (%),Syntax (%)\n"
-            + "\n".join(f"{lbl},{pcnt},{scnt}" for lbl, pcnt, scnt in zip(*d2))
-            + "\n"
-        )
+
+if __name__ == "__main__":
+    main()
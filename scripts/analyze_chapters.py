@@ -1,6 +1,5 @@
+import argparse
 import os
-import pandas as pd
-import numpy as np
 import re
 from collections import namedtuple
 
@@ -58,6 +57,8 @@ def get_chapter_explanation_totals(chap_values, exp_values, chapter_dict, explan
             explanation_dict['totals'][exp] += 1
 
 def analyze_categories(values, chap_values, exp_values, keyword_values, cat_dict):
+    import numpy as np
+
     # Initialize spreadsheet JSON object
     file_cat_dict = setup_cat_dict()
     # Use category column to loop through all values
@@ -123,6 +124,8 @@ def analyze_categories(values, chap_values, exp_values, keyword_values, cat_dict
     return dict(sorted(file_cat_dict.items(), key=lambda item: item[1]['count'], reverse=True))
 
 def get_keywords(values, keyword_dict):
+    import numpy as np
+
     file_keyword_dict = {}
     totals_dict = keyword_dict['totals']
     for index, keywords in enumerate(values):
@@ -141,7 +144,18 @@ def get_keywords(values, keyword_dict):
     return dict(sorted(file_keyword_dict.items(), key=lambda item: item[1], reverse=True))
             
 
-if __name__ == "__main__":
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Count variation categories, chapters, explanations and keywords.')
+    parser.add_argument(
+        'spreadsheets',
+        nargs='?',
+        default=loc,
+        help='folder with the grammar spreadsheets (defaults to %(default)s)',
+    )
+    args = parser.parse_args(argv)
+    # NOTE: pandas is slow to import, so only load it once we know we need it.
+    import pandas as pd
+
     # Setting up dictionary to print
     cat_dict = {
         'totals': setup_cat_dict(),
@@ -162,9 +176,9 @@ if __name__ == "__main__":
     }
 
     total_cats = 0
-    for filename in os.listdir(loc):
+    for filename in os.listdir(args.spreadsheets):
         # DataFrame object
-        df = pd.read_excel(os.path.join(loc, filename))
+        df = pd.read_excel(os.path.join(args.spreadsheets, filename))
         df.columns = [x.lower().rstrip() for x in df.columns]
 
         print(f"\n..Checking for Category names in {filename}")
@@ -203,3 +217,7 @@ if __name__ == "__main__":
         'keywords': keyword_dict
     }
     print(final_dict)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,6 @@
+import argparse
 import os
 import pprint
-import pandas as pd
-import numpy as np
 import re
 from collections import namedtuple
 
@@ -28,6 +27,8 @@ def check_column_headers(df):
             print(f".....Found inconsistent header for \'{col_label}\' column: {col}")
     
 def check_categories(values, cat_dict, desc_values):
+    import numpy as np
+
     file_cat_dict = {}
     for index, cat in enumerate(values):
         row_num = index + 2
@@ -68,6 +69,8 @@ def check_categories(values, cat_dict, desc_values):
     return dict(sorted(file_cat_dict.items(), key=lambda item: item[1], reverse=True))
 
 def get_keywords(values, keyword_dict):
+    import numpy as np
+
     file_keyword_dict = {}
     totals_dict = keyword_dict['totals']
     for index, keywords in enumerate(values):
@@ -86,7 +89,18 @@ def get_keywords(values, keyword_dict):
     return dict(sorted(file_keyword_dict.items(), key=lambda item: item[1], reverse=True))
             
 
-if __name__ == "__main__":
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Count variation categories and keywords.')
+    parser.add_argument(
+        'spreadsheets',
+        nargs='?',
+        default=loc,
+        help='folder with the grammar spreadsheets (defaults to %(default)s)',
+    )
+    args = parser.parse_args(argv)
+    # NOTE: pandas is slow to import, so only load it once we know we need it.
+    import pandas as pd
+
     # Setting up dictionary to print
     cat_dict = {
         'totals': dict.fromkeys(categories, 0),
@@ -100,9 +114,9 @@ if __name__ == "__main__":
         'spreadsheets': {}
     }
     
-    for filename in os.listdir(loc):
+    for filename in os.listdir(args.spreadsheets):
         # DataFrame object
-        df = pd.read_excel(os.path.join(loc, filename))
+        df = pd.read_excel(os.path.join(args.spreadsheets, filename))
         df.columns = [x.lower() for x in df.columns]
 
         print(f"\n..Checking for Category names in {filename}")
@@ -127,4 +141,8 @@ if __name__ == "__main__":
         'categories': cat_dict,
         'keywords': keyword_dict
     }
-    print(final_dict)
\ No newline at end of file
+    print(final_dict)
+
+
+if __name__ == "__main__":
+    main()
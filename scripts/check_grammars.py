@@ -1,7 +1,6 @@
+import argparse
 import os
 import re
-import pandas as pd
-import numpy as np
 
 # CHANGE THIS FILE PATH TO YOUR FOLDER WITH THE GRAMMAR SPREADSHEETS
 loc = (r"../Spreadsheets")
@@ -46,11 +45,22 @@ def check_values(values, categories, col_name):
         print(f"Found no values for {col_name}")
 
 
-if __name__ == "__main__":
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Check grammar spreadsheets for unrecognized values.')
+    parser.add_argument(
+        'spreadsheets',
+        nargs='?',
+        default=loc,
+        help='folder with the grammar spreadsheets (defaults to %(default)s)',
+    )
+    args = parser.parse_args(argv)
+    # NOTE: pandas is slow to import, so only load it once we know we need it.
+    import pandas as pd
+
     
-    for filename in os.listdir(loc):
+    for filename in os.listdir(args.spreadsheets):
         # DataFrame object
-        df = pd.read_excel(os.path.join(loc, filename))
+        df = pd.read_excel(os.path.join(args.spreadsheets, filename))
         df.columns = [x.lower().strip() for x in df.columns]
         print(f"Generating report for: {filename}\n")
         print(f"..Checking for inconsistent column headers in {filename}")
@@ -67,3 +77,7 @@ if __name__ == "__main__":
         check_values(exp_values, explanations, 'Explanation for Variation')
     
         print("\n---\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,14 @@
 import argparse
-import json
 import re
 import string
+import sys
 from collections import namedtuple
 from pathlib import Path
 
+# Page archives are produced by the PDF converter, which lives in `server/`.
+sys.path.append(str(Path(__file__).resolve().parent.parent / "server"))
+from page_archive import load_pages  # noqa: E402
+
 # TODOs:
 # Find context across page boundaries
 # Find co-occurences
@@ -80,12 +84,12 @@ def format_results(results):
     return "\n\n".join(map(format_result, results))
 
 
-if __name__ == "__main__":
+def main(argv=None):
     parser = argparse.ArgumentParser(description="Search for keywords.")
     parser.add_argument(
         "file",
         type=str,
-        help="a JSON file to search",
+        help="a JSON file or page archive to search",
     )
     parser.add_argument(
         "keywords",
@@ -98,10 +102,9 @@ if __name__ == "__main__":
         type=str,
         help="the file to write search results (defaults to <input file>.txt)",
     )
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
-    with open(args.file, "rb") as f:
-        pages = json.load(f)
+    pages = load_pages(Path(args.file))
     keywords = parse_keywords(args.keywords)
 
     results = search_for_words(pages, keywords)
@@ -112,3 +115,7 @@ if __name__ == "__main__":
     with open(out, "w", encoding="utf-8") as f:
         f.write(format_results(results))
     print(f"{len(results)} search results written to {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""Binary page archives, an alternative to the JSON page arrays of pdf2json.
+
+Layout (all integers little-endian):
+
+    header   magic (8 bytes), format version (u32), page count N (u64)
+    offsets  N + 1 byte offsets (u64) into the page data, the last one being
+             its total length
+    data     the UTF-8 encoded pages, concatenated
+
+Opening an archive maps it into memory, so fetching any page is O(1) and only
+touches that page's bytes.
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence, Union, overload
+
+MAGIC = b"GVPAGES\0"
+VERSION = 1
+
+HEADER = struct.Struct("<8sIQ")
+OFFSET = struct.Struct("<Q")
+SPAN = struct.Struct("<QQ")
+
+
+class ArchiveError(Exception):
+    pass
+
+
+def write_archive(pages: Iterable[str], out: Path) -> None:
+    blobs = [page.encode("utf-8") for page in pages]
+    offsets = [0]
+    for blob in blobs:
+        offsets.append(offsets[-1] + len(blob))
+    with open(out, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(blobs)))
+        f.write(struct.pack(f"<{len(offsets)}Q", *offsets))
+        f.writelines(blobs)
+
+
+def is_archive(path: Path) -> bool:
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+class PageArchive(Sequence[str]):
+    """Read-only, memory-mapped view of a page archive."""
+
+    def __init__(self, path: Path) -> None:
+        with open(path, "rb") as f:
+            # NOTE: mmap refuses to map empty files, so check the size first.
+            if os.fstat(f.fileno()).st_size < HEADER.size:
+                raise ArchiveError(f"{path}: truncated header")
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, self.npages = HEADER.unpack_from(self.mm)
+            if magic != MAGIC:
+                raise ArchiveError(f"{path}: not a page archive")
+            if version != VERSION:
+                raise ArchiveError(f"{path}: unsupported version {version}")
+            self.data_start = HEADER.size + (self.npages + 1) * OFFSET.size
+            if len(self.mm) < self.data_start:
+                raise ArchiveError(f"{path}: truncated offset table")
+            (data_len,) = OFFSET.unpack_from(self.mm, self.data_start - OFFSET.size)
+            if self.data_start + data_len != len(self.mm):
+                raise ArchiveError(f"{path}: truncated page data")
+        except Exception:
+            self.mm.close()
+            raise
+
+    def page_bytes(self, idx: int) -> memoryview:
+        """The UTF-8 bytes of page `idx`, without copying them.
+
+        The view must be released before the archive is closed.
+        """
+        if idx < 0:
+            idx += self.npages
+        if not 0 <= idx < self.npages:
+            raise IndexError("page index out of range")
+        start, end = SPAN.unpack_from(self.mm, HEADER.size + idx * OFFSET.size)
+        return memoryview(self.mm)[self.data_start + start : self.data_start + end]
+
+    @overload
+    def __getitem__(self, idx: int) -> str: ...
+
+    @overload
+    def __getitem__(self, idx: slice) -> List[str]: ...
+
+    def __getitem__(self, idx: Union[int, slice]) -> Union[str, List[str]]:
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(self.npages))]
+        with self.page_bytes(idx) as page:
+            return str(page, "utf-8")
+
+    def __len__(self) -> int:
+        return self.npages
+
+    def close(self) -> None:
+        self.mm.close()
+
+    def __enter__(self) -> "PageArchive":
+        return self
+
+    def __exit__(self, *_exc: object) -> None:
+        self.close()
+
+
+def load_pages(path: Path) -> Sequence[str]:
+    """Open `path` as a page archive or a JSON page array, whichever it is."""
+    if is_archive(path):
+        return PageArchive(path)
+    with open(path, "rb") as f:
+        return json.load(f)
+
+
+def json_to_archive(src: Path, dst: Path) -> None:
+    with open(src, "rb") as f:
+        write_archive(json.load(f), dst)
+
+
+def archive_to_json(src: Path, dst: Path) -> None:
+    with PageArchive(src) as pages:
+        dst.write_text(json.dumps(list(pages)))
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Convert between JSON page arrays and page archives."
+    )
+    parser.add_argument(
+        "file",
+        type=Path,
+        help="JSON page array or page archive to convert",
+    )
+    parser.add_argument(
+        "output",
+        type=Path,
+        help="where to write the converted file",
+    )
+    args = parser.parse_args(argv)
+
+    if is_archive(args.file):
+        archive_to_json(args.file, args.output)
+    else:
+        json_to_archive(args.file, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,54 @@
 import argparse
 import gzip
+import hashlib
 import json
+import math
+import mimetypes
+import re
 import socket
 import sys
+import threading
 import time
+import uuid
+import zlib
+from collections import OrderedDict, deque
 from http import HTTPStatus
-from http.server import HTTPServer, SimpleHTTPRequestHandler
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
 from io import BytesIO
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
 
-import pdftotext  # type: ignore
+from page_archive import write_archive
 
 READ_BYTES = 1024 * 16
 
+WEB_DIR = Path(__file__).resolve().parent / "web"
+
+# Longest a client may block on `GET /jobs/<id>?wait=<seconds>`.
+MAX_WAIT = 30.0
+
+# Idle keep-alive connections are dropped after this many seconds.
+KEEPALIVE_TIMEOUT = 60.0
+
+# Static assets are small and change rarely, so let clients revalidate them
+# cheaply with `If-None-Match` instead of downloading them again.
+STATIC_CACHE_CONTROL = "no-cache"
+
+# Rate limiter state is dropped for idle clients once there are this many.
+MAX_TRACKED_CLIENTS = 1024
+
+# After rejecting an upload, read and discard at most this much of its body
+# for at most this many seconds before hanging up.
+DRAIN_LIMIT = 256 * 1024 * 1024
+DRAIN_TIMEOUT = 10.0
+
+# Content codings in order of preference, used when the client accepts several
+# equally.
+CODECS = ("zstd", "br", "gzip", "deflate")
+ZSTD_LEVEL = 3
+BROTLI_QUALITY = 5
+
 
 def find_ip() -> Optional[str]:
     with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
@@ -25,11 +60,22 @@ def find_ip() -> Optional[str]:
             return None
 
 
+def pdf_pages(pdf: BytesIO) -> List[str]:
+    # NOTE: Imported lazily so that `--help` and server startup stay fast.
+    import pdftotext  # type: ignore
+
+    return list(pdftotext.PDF(pdf))
+
+
 def pdf2json(pdf: BytesIO) -> str:
-    return json.dumps(list(pdftotext.PDF(pdf)))
+    return json.dumps(pdf_pages(pdf))
 
 
-def parse_local(pdf: Path, out: Optional[Path]):
+def parse_local(pdf: Path, out: Optional[Path], fmt: str = "json"):
+    if fmt == "archive":
+        assert out is not None
+        write_archive(pdf_pages(BytesIO(pdf.read_bytes())), out)
+        return
     json = pdf2json(BytesIO(pdf.read_bytes()))
     if out is None:
         print(json)
@@ -37,20 +83,653 @@ def parse_local(pdf: Path, out: Optional[Path]):
         out.write_text(json)
 
 
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    if header is None:
+        return False
+    tags = [tag.strip() for tag in header.split(",")]
+    return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+
+
+def parse_accept_encoding(header: Optional[str]) -> Dict[str, float]:
+    accepted = {}
+    for coding in (header or "").split(","):
+        name, _, params = coding.partition(";")
+        name = name.strip().lower()
+        if name == "":
+            continue
+        qvalue = 1.0
+        for param in params.split(";"):
+            key, _, val = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    qvalue = float(val)
+                except ValueError:
+                    qvalue = 0.0
+        accepted[name] = qvalue
+    return accepted
+
+
+def make_codecs(
+    names: List[str], gzip_level: int
+) -> Dict[str, Callable[[bytes], bytes]]:
+    available: Dict[str, Callable[[bytes], bytes]] = {
+        "gzip": lambda data: gzip.compress(data, gzip_level),
+        "deflate": lambda data: zlib.compress(data, gzip_level),
+    }
+    if "zstd" in names:
+        try:
+            import zstandard  # type: ignore
+
+            available["zstd"] = zstandard.ZstdCompressor(ZSTD_LEVEL).compress
+        except ImportError:
+            pass
+    if "br" in names:
+        try:
+            import brotli  # type: ignore
+
+            available["br"] = lambda data: brotli.compress(data, quality=BROTLI_QUALITY)
+        except ImportError:
+            pass
+
+    codecs = {}
+    for name in names:
+        if name == "identity":
+            continue
+        if name not in available:
+            log(f"Compression codec {name!r} is not available")
+            continue
+        codecs[name] = available[name]
+    return codecs
+
+
+class Compression:
+    """Picks a `Content-Encoding` for each response and applies it.
+
+    Keeps running totals of the CPU time spent compressing and the bytes it
+    saved, so the codec, level and threshold can be tuned per deployment.
+    """
+
+    def __init__(
+        self, codecs: Dict[str, Callable[[bytes], bytes]], min_size: int
+    ) -> None:
+        self.codecs = codecs
+        self.min_size = min_size
+        self.lock = threading.Lock()
+        # encoding -> [cpu seconds, bytes in, bytes out]
+        self.stats: Dict[str, List[float]] = {name: [0, 0, 0] for name in codecs}
+
+    def negotiate(self, header: Optional[str], size: int) -> str:
+        if size < self.min_size:
+            return "identity"
+        accepted = parse_accept_encoding(header)
+        default = accepted.get("*", 0.0)
+        best, best_q = "identity", accepted.get("identity", 0.0)
+        for name in self.codecs:
+            qvalue = accepted.get(name, default)
+            # Ties go to the earlier codec, and any codec beats identity.
+            if qvalue > 0 and (
+                qvalue > best_q or (qvalue == best_q and best == "identity")
+            ):
+                best, best_q = name, qvalue
+        return best
+
+    def compress(self, encoding: str, data: bytes) -> bytes:
+        if encoding == "identity":
+            return data
+        now = time.thread_time()
+        data_zip = self.codecs[encoding](data)
+        delta = time.thread_time() - now
+
+        with self.lock:
+            stats = self.stats[encoding]
+            stats[0] += delta
+            stats[1] += len(data)
+            stats[2] += len(data_zip)
+            total_cpu, total_in, total_out = stats
+        log(
+            f"Compressed {len(data)} bytes with {encoding} to {len(data_zip)}"
+            f" ({1 - len(data_zip) / len(data):.2%} saved) in {delta:.6f}s CPU;"
+            f" {encoding} total: {int(total_in - total_out)} bytes saved"
+            f" in {total_cpu:.6f}s CPU"
+        )
+        return data_zip
+
+
+class StaticFile:
+    """An asset from `WEB_DIR`, kept in memory along with its compressed
+    variants.
+    """
+
+    def __init__(self, path: Path, compression: Compression) -> None:
+        body = path.read_bytes()
+        digest = hashlib.sha1(body).hexdigest()
+        self.content_type = mimetypes.guess_type(path.name)[0] or (
+            "application/octet-stream"
+        )
+        if self.content_type.startswith("text/"):
+            self.content_type += "; charset=utf-8"
+        # encoding -> (etag, body)
+        self.variants: Dict[str, Tuple[str, bytes]] = {
+            "identity": (f'"{digest}"', body)
+        }
+        if len(body) < compression.min_size:
+            return
+        for encoding in compression.codecs:
+            body_zip = compression.compress(encoding, body)
+            if len(body_zip) < len(body):
+                self.variants[encoding] = (f'"{digest}-{encoding}"', body_zip)
+
+
+def load_static(root: Path, compression: Compression) -> Dict[str, StaticFile]:
+    files = {}
+    for path in sorted(root.rglob("*")):
+        if path.is_file():
+            url = "/" + path.relative_to(root).as_posix()
+            files[url] = StaticFile(path, compression)
+            if path.name == "index.html":
+                files[url.removesuffix("index.html")] = files[url]
+    return files
+
+
+def log(msg: str) -> None:
+    sys.stderr.write(f"[{time.strftime('%d/%b/%Y %H:%M:%S')}] {msg}\n")
+
+
+class Rejected(Exception):
+    """An upload turned away by admission control."""
+
+    def __init__(self, status: HTTPStatus, message: str, retry_after: int) -> None:
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.last = time.monotonic()
+
+    def refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+
+    def take(self) -> float:
+        """Take a token, or return how many seconds until one is available."""
+        self.refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """Per-client token buckets allowing `rate` uploads per second on average,
+    and bursts of up to `burst` uploads.
+    """
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.lock = threading.Lock()
+
+    def admit(self, client: str) -> None:
+        if self.rate <= 0:
+            return
+        with self.lock:
+            if client not in self.buckets:
+                if len(self.buckets) >= MAX_TRACKED_CLIENTS:
+                    self.prune()
+                self.buckets[client] = TokenBucket(self.rate, self.burst)
+            wait = self.buckets[client].take()
+        if wait > 0:
+            raise Rejected(
+                HTTPStatus.TOO_MANY_REQUESTS, "Too many uploads", math.ceil(wait)
+            )
+
+    def prune(self) -> None:
+        # NOTE: Caller must hold `self.lock`. A full bucket behaves the same
+        # as a new one, so it is safe to forget.
+        for client, bucket in list(self.buckets.items()):
+            bucket.refill()
+            if bucket.tokens >= bucket.burst:
+                del self.buckets[client]
+
+
+class Job:
+    def __init__(self, name: str, pdf: bytes, client: str) -> None:
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.client = client
+        self.digest = hashlib.sha256(pdf).hexdigest()
+        self.pdf: Optional[bytes] = pdf
+        self.status = "queued"
+        self.error: Optional[str] = None
+        self.result: Optional[bytes] = None
+        self.finished: Optional[float] = None
+        self.done = threading.Event()
+        # encoding -> compressed result, guarded by the lock of the JobQueue
+        self.encoded: Dict[str, bytes] = {}
+
+    def size(self) -> int:
+        """Bytes held for the result, in all encodings."""
+        return len(self.result or b"") + sum(map(len, self.encoded.values()))
+
+    def to_dict(self) -> Dict[str, Any]:
+        info: Dict[str, Any] = {
+            "id": self.id,
+            "name": self.name,
+            "status": self.status,
+        }
+        if self.status == "done":
+            info["result"] = f"/jobs/{self.id}/result"
+        if self.error is not None:
+            info["error"] = self.error
+        return info
+
+
+class JobQueue:
+    """Converts uploaded PDFs on a fixed number of worker threads.
+
+    The number of workers caps how many conversions run at once. Waiting jobs
+    are queued per client and the workers take from each client in turn, so
+    one client uploading a batch of PDFs does not hold up everyone else.
+
+    Finished jobs are kept around for `ttl` seconds so that clients have time
+    to download the result, or until their results take up more than
+    `max_retained` bytes, in which case the oldest are dropped first.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        max_queued: int,
+        max_queued_per_client: int,
+        ttl: float,
+        max_retained: int,
+    ) -> None:
+        self.ttl = ttl
+        self.max_retained = max_retained
+        self.max_queued = max_queued
+        self.max_queued_per_client = max_queued_per_client
+        self.jobs: Dict[str, Job] = {}
+        # Finished jobs, oldest first, and the bytes their results take up
+        self.finished: Deque[Job] = deque()
+        self.retained = 0
+        self.lock = threading.Lock()
+        self.ready = threading.Condition(self.lock)
+        # client -> waiting jobs, in the order clients are served
+        self.pending: "OrderedDict[str, Deque[Job]]" = OrderedDict()
+        self.queued = 0
+        # Running average of conversion time, used to suggest `Retry-After`
+        self.avg_duration = 1.0
+        # NOTE: Imported here rather than in the workers, so that a missing
+        # pdftotext stops the server at startup instead of silently killing
+        # every worker thread.
+        import pdftotext  # type: ignore
+
+        self.pdf_error = pdftotext.Error
+        self.workers: List[threading.Thread] = []
+        for _ in range(workers):
+            worker = threading.Thread(target=self.work, daemon=True)
+            worker.start()
+            self.workers.append(worker)
+
+    def retry_after(self, queued: int) -> int:
+        # NOTE: Caller must hold `self.lock`.
+        return max(1, math.ceil(self.avg_duration * queued / len(self.workers)))
+
+    def submit(self, name: str, pdf: bytes, client: str) -> Job:
+        job = Job(name, pdf, client)
+        with self.lock:
+            self.expire()
+            waiting = self.pending.get(client, deque())
+            if len(waiting) >= self.max_queued_per_client:
+                raise Rejected(
+                    HTTPStatus.TOO_MANY_REQUESTS,
+                    "Too many queued jobs for this client",
+                    self.retry_after(len(waiting)),
+                )
+            if self.queued >= self.max_queued:
+                raise Rejected(
+                    HTTPStatus.SERVICE_UNAVAILABLE,
+                    "Too many queued jobs",
+                    self.retry_after(self.queued),
+                )
+            self.jobs[job.id] = job
+            waiting.append(job)
+            self.pending[client] = waiting
+            self.queued += 1
+            self.ready.notify()
+        return job
+
+    def next_job(self) -> Job:
+        with self.lock:
+            while not self.pending:
+                self.ready.wait()
+            client, waiting = self.pending.popitem(last=False)
+            job = waiting.popleft()
+            if waiting:
+                # Back of the line until every other client had a turn
+                self.pending[client] = waiting
+            self.queued -= 1
+            return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self.lock:
+            self.expire()
+            return self.jobs.get(job_id)
+
+    def expire(self) -> None:
+        # NOTE: Caller must hold `self.lock`. The newest result is kept even
+        # on its own over budget, so that its client still gets a chance to
+        # download it.
+        deadline = time.time() - self.ttl
+        while self.finished:
+            job = self.finished[0]
+            assert job.finished is not None
+            if job.finished >= deadline and (
+                self.retained <= self.max_retained or len(self.finished) == 1
+            ):
+                break
+            if job.finished >= deadline:
+                log(f"Dropping result of {job.name} ({job.id}) to free memory")
+            self.finished.popleft()
+            self.retained -= job.size()
+            del self.jobs[job.id]
+
+    def encode(self, job: Job, compression: Compression, encoding: str) -> bytes:
+        """The result of `job` in `encoding`, compressed on first use."""
+        assert job.result is not None
+        if encoding == "identity":
+            return job.result
+        with self.lock:
+            body = job.encoded.get(encoding)
+        if body is not None:
+            return body
+        # NOTE: Compress without holding the lock, so that a big result does
+        # not hold up every other request. Requests racing here each compress
+        # it, and the first one to finish gets cached.
+        body = compression.compress(encoding, job.result)
+        with self.lock:
+            if encoding in job.encoded:
+                return job.encoded[encoding]
+            job.encoded[encoding] = body
+            if job.id in self.jobs:
+                self.retained += len(body)
+                self.expire()
+        return body
+
+    def work(self) -> None:
+        while True:
+            job = self.next_job()
+            job.status = "running"
+            status = "failed"
+            try:
+                assert job.pdf is not None
+                now = time.time()
+                json = pdf2json(BytesIO(job.pdf)).encode("utf-8")
+                delta = time.time() - now
+                log(f"Converted {job.name} ({job.id}) in {delta:.6f} seconds")
+                with self.lock:
+                    self.avg_duration = 0.8 * self.avg_duration + 0.2 * delta
+
+                job.result = json
+                status = "done"
+            except self.pdf_error as e:
+                log(f"Failed to convert {job.name} ({job.id}): {e}")
+                job.error = f"Invalid PDF: {e}"
+            except Exception as e:  # pylint: disable=broad-except
+                # Keep the worker alive for the next job.
+                log(f"Error converting {job.name} ({job.id}): {e!r}")
+                job.error = "Internal error"
+            finally:
+                job.pdf = None
+                with self.lock:
+                    job.finished = time.time()
+                    self.finished.append(job)
+                    self.retained += job.size()
+                    self.expire()
+                job.status = status
+                job.done.set()
+
+
 class Handler(SimpleHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    timeout = KEEPALIVE_TIMEOUT
+
+    jobs: JobQueue
+    limiter: RateLimiter
+    # Whether the current upload already passed the rate limiter when the
+    # client sent `Expect: 100-continue`
+    admitted = False
+    compression: Compression
+    max_upload: int
+    static: Dict[str, StaticFile] = {}
+
     def __init__(self, *args: Any, **kwargs: Any) -> None:
-        kwargs["directory"] = "web"
+        kwargs["directory"] = str(WEB_DIR)
         super().__init__(*args, **kwargs)
 
+    def send_cached(
+        self,
+        content_type: str,
+        encoding: str,
+        etag: str,
+        get_body: Callable[[], bytes],
+        cache_control: str,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> None:
+        """Send the body from `get_body`, or just `304 Not Modified` if the
+        client has `etag`, in which case `get_body` is not called.
+        """
+        modified = not etag_matches(self.headers.get("If-None-Match"), etag)
+        if modified:
+            body = get_body()
+            self.send_response(HTTPStatus.OK)
+            self.send_header("Content-Type", content_type)
+            if encoding != "identity":
+                self.send_header("Content-Encoding", encoding)
+            self.send_header("Content-Length", str(len(body)))
+            for key, val in (headers or {}).items():
+                self.send_header(key, val)
+        else:
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", cache_control)
+        self.send_header("Vary", "Accept-Encoding")
+        self.end_headers()
+        if modified and self.command != "HEAD":
+            self.wfile.write(body)
+
+    def send_static(self) -> bool:
+        static = self.static.get(urlsplit(self.path).path)
+        if static is None:
+            return False
+        size = len(static.variants["identity"][1])
+        encoding = self.compression.negotiate(self.headers.get("Accept-Encoding"), size)
+        if encoding not in static.variants:
+            encoding = "identity"
+        etag, body = static.variants[encoding]
+        self.send_cached(
+            static.content_type, encoding, etag, lambda: body, STATIC_CACHE_CONTROL
+        )
+        return True
+
+    def do_HEAD(self) -> None:
+        if not self.send_static():
+            super().do_HEAD()
+
+    def send_json(
+        self,
+        status: HTTPStatus,
+        obj: Any,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> None:
+        body = json.dumps(obj).encode("utf-8")
+        self.send_response(status)
+        for key, val in (headers or {}).items():
+            self.send_header(key, val)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        parts = url.path.strip("/").split("/")
+        if parts[0] != "jobs":
+            if not self.send_static():
+                super().do_GET()
+            return
+
+        job = self.jobs.get(parts[1]) if len(parts) in (2, 3) else None
+        if job is None or (len(parts) == 3 and parts[2] != "result"):
+            self.send_error(HTTPStatus.NOT_FOUND, "No such job")
+            return
+
+        if len(parts) == 2:
+            # Long-poll: block until the job finishes or `wait` runs out.
+            query = parse_qs(url.query)
+            try:
+                wait = min(float(query.get("wait", ["0"])[0]), MAX_WAIT)
+            except ValueError:
+                self.send_error(HTTPStatus.BAD_REQUEST, "Invalid wait")
+                return
+            if wait > 0:
+                job.done.wait(wait)
+            self.send_json(HTTPStatus.OK, job.to_dict())
+            return
+
+        if job.finished is None or job.result is None:
+            self.send_error(HTTPStatus.CONFLICT, f"Job is {job.status}", job.error)
+            return
+
+        # The result for a job never changes, so it may be cached until the
+        # job expires.
+        max_age = max(int(job.finished + self.jobs.ttl - time.time()), 0)
+        filename = Path(job.name).with_suffix(".json").name
+        encoding = self.compression.negotiate(
+            self.headers.get("Accept-Encoding"), len(job.result)
+        )
+        etag = f'"{job.digest}-{encoding}"'
+        self.send_cached(
+            "application/json; charset=utf-8",
+            encoding,
+            etag,
+            lambda: self.jobs.encode(job, self.compression, encoding),
+            f"private, max-age={max_age}",
+            {"Content-Disposition": f'attachment; filename="{filename}"'},
+        )
+
+    def drain(self, msg_len: int) -> None:
+        """Discard the unread body of a rejected upload.
+
+        Closing a socket with unread data resets the connection, and a client
+        still busy uploading would see that instead of our response. So stop
+        sending, then read what the client sends (within limits) before
+        hanging up.
+        """
+        try:
+            self.connection.shutdown(socket.SHUT_WR)
+        except OSError:
+            return
+        deadline = time.monotonic() + DRAIN_TIMEOUT
+        remaining = min(msg_len, DRAIN_LIMIT)
+        while remaining > 0:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            self.connection.settimeout(timeout)
+            try:
+                chunk = self.rfile.read1(min(remaining, READ_BYTES))
+            except OSError:
+                break
+            if chunk == b"":
+                break
+            remaining -= len(chunk)
+
+    def reject(self, rejected: Rejected, unread: int = 0) -> None:
+        """Answer with `rejected` and close the connection, first discarding
+        `unread` bytes of request body.
+        """
+        self.log_message(f"Rejected upload: {rejected.message}")
+        self.send_json(
+            rejected.status,
+            {"error": rejected.message, "retry_after": rejected.retry_after},
+            {"Retry-After": str(rejected.retry_after), "Connection": "close"},
+        )
+        if unread > 0:
+            self.drain(unread)
+
+    def check_length(self, sent: bool) -> Optional[int]:
+        """Return the upload's length, or answer with an error and return
+        None. `sent` says whether the client is already sending the body.
+        """
+        try:
+            msg_len = int(self.headers.get("Content-Length", ""))
+        except ValueError:
+            msg_len = -1
+        if msg_len < 0:
+            self.send_error(HTTPStatus.LENGTH_REQUIRED)
+            return None
+        if msg_len > self.max_upload:
+            self.log_message(f"Rejected upload of {msg_len} bytes")
+            self.send_json(
+                HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                {"error": f"Uploads are limited to {self.max_upload} bytes"},
+                {"Connection": "close"},
+            )
+            if sent:
+                self.drain(msg_len)
+            return None
+        return msg_len
+
+    def handle_expect_100(self) -> bool:
+        # Clients that ask first never have to send an upload we would turn
+        # away.
+        self.admitted = False
+        if self.command == "POST":
+            if self.check_length(sent=False) is None:
+                return False
+            try:
+                self.limiter.admit(self.client_address[0])
+            except Rejected as e:
+                self.reject(e)
+                return False
+            self.admitted = True
+        return super().handle_expect_100()
+
     def do_POST(self) -> None:
+        if urlsplit(self.path).path.rstrip("/") not in ("", "/jobs"):
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+
         self.log_message(self.requestline)
+        client = self.client_address[0]
+        # Turn uploads away before reading them, so a rejected upload costs us
+        # nothing but the headers (and discarding its body).
+        msg_len = self.check_length(sent=True)
+        if msg_len is None:
+            return
+        admitted, self.admitted = self.admitted, False
+        try:
+            if not admitted:
+                self.limiter.admit(client)
+        except Rejected as e:
+            self.reject(e, msg_len)
+            return
+
         headers: Dict[str, str] = dict(
             tuple(head.split(":", 1))  # type: ignore
             for head in str(self.headers).splitlines()
             if head.strip() != ""
         )
 
-        msg_len = int(headers["Content-Length"])
         boundary = headers["Content-Type"].split("=")[1].strip()
         self.log_message(f"Content-Length: {msg_len}")
         self.log_message(f"Boundary: {boundary}")
@@ -63,28 +742,27 @@ class Handler(SimpleHTTPRequestHandler):
                 break
             buf.append(msg)
             msg_len -= len(msg)
-        msg = Handler.parse_file(b"".join(buf), boundary.encode("utf-8"))
+        body = b"".join(buf)
+        msg = Handler.parse_file(body, boundary.encode("utf-8"))
+        name = Handler.parse_filename(body)
+
         try:
-            now = time.time()
-            json = pdf2json(BytesIO(msg)).encode("utf-8")
-            delta = time.time() - now
-            self.log_message(f"Converted PDF in {delta:.6f} seconds")
-        except pdftotext.Error as e:
-            self.send_error(HTTPStatus.INTERNAL_SERVER_ERROR, "Invalid PDF", str(e))
+            job = self.jobs.submit(name, msg, client)
+        except Rejected as e:
+            self.reject(e)
             return
+        self.log_message(f"Queued {name} as job {job.id}")
+        self.send_json(
+            HTTPStatus.ACCEPTED, job.to_dict(), {"Location": f"/jobs/{job.id}"}
+        )
 
-        json_zip = gzip.compress(json)
-        cmp_ratio = 1 - (len(json_zip) / len(json))
-        # NOTE: Need to escape '%' since `log_message` treats it as a format
-        # string.
-        self.log_message(f"Compressed JSON by {cmp_ratio:.2%}".replace("%", "%%"))
-
-        self.send_response(HTTPStatus.OK)
-        self.send_header("Content-Type", "application/json; charset=utf-8")
-        self.send_header("Content-Encoding", "gzip")
-        self.send_header("Content-Length", str(len(json_zip)))
-        self.end_headers()
-        self.wfile.write(json_zip)
+    @staticmethod
+    def parse_filename(msg: bytes) -> str:
+        head = msg[: msg.find(b"\r\n\r\n")].decode("utf-8", "replace")
+        match = re.search(r'filename="([^"]*)"', head)
+        if match is None or match.group(1) == "":
+            return "document.pdf"
+        return match.group(1)
 
     @staticmethod
     def parse_file(msg: bytes, boundary: bytes) -> bytes:
@@ -97,7 +775,14 @@ class Handler(SimpleHTTPRequestHandler):
         return msg
 
 
-if __name__ == "__main__":
+def positive_int(text: str) -> int:
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, not {value}")
+    return value
+
+
+def main(argv: Optional[List[str]] = None) -> None:
     parser = argparse.ArgumentParser(description="Convert PDF to JSON.")
     parser.add_argument(
         "-p",
@@ -118,12 +803,94 @@ if __name__ == "__main__":
         type=Path,
         help="where to write output (defaults to stdout)",
     )
-    args = parser.parse_args()
+    parser.add_argument(
+        "-f",
+        "--format",
+        choices=("json", "archive"),
+        default="json",
+        help="output format for local conversion: a JSON array of pages, or a"
+        " binary page archive (see page_archive.py; requires --output)",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=positive_int,
+        default=2,
+        help="number of PDFs to convert concurrently",
+    )
+    parser.add_argument(
+        "-q",
+        "--max-queued",
+        type=int,
+        default=64,
+        help="number of jobs that may wait for a worker",
+    )
+    parser.add_argument(
+        "--max-queued-per-client",
+        type=int,
+        default=8,
+        help="number of jobs a single client may have waiting",
+    )
+    parser.add_argument(
+        "--max-upload",
+        type=float,
+        default=64,
+        help="largest accepted upload in MiB",
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=30,
+        help="uploads per minute allowed per client (0 for no limit)",
+    )
+    parser.add_argument(
+        "--burst",
+        type=positive_int,
+        default=5,
+        help="uploads a client may make in a burst before --rate applies",
+    )
+    parser.add_argument(
+        "--ttl",
+        type=float,
+        default=60 * 60,
+        help="seconds to keep finished jobs for download",
+    )
+    parser.add_argument(
+        "--max-retained",
+        type=float,
+        default=512,
+        help="MiB of finished results to keep in memory; the oldest are"
+        " dropped first once this is exceeded",
+    )
+    parser.add_argument(
+        "-c",
+        "--codecs",
+        default=",".join(CODECS),
+        help="comma-separated content codings to offer, most preferred first"
+        f" (any of {', '.join(CODECS)})",
+    )
+    parser.add_argument(
+        "--gzip-level",
+        type=int,
+        choices=range(1, 10),
+        metavar="{1-9}",
+        default=6,
+        help="compression level for gzip and deflate (1-9)",
+    )
+    parser.add_argument(
+        "--min-compress",
+        type=int,
+        default=1024,
+        help="responses smaller than this many bytes are sent uncompressed",
+    )
+    args = parser.parse_args(argv)
 
     pdf = args.file
     if pdf is not None:
-        parse_local(pdf, args.output)
-        sys.exit()
+        if args.format == "archive" and args.output is None:
+            parser.error("--format archive requires --output")
+        parse_local(pdf, args.output, args.format)
+        return
 
     host = find_ip()
     port = args.port
@@ -131,9 +898,26 @@ if __name__ == "__main__":
     if host is None:
         host = "0.0.0.0"
 
-    with HTTPServer(("0.0.0.0", port), Handler) as serv:
+    Handler.jobs = JobQueue(
+        args.workers,
+        args.max_queued,
+        args.max_queued_per_client,
+        args.ttl,
+        int(args.max_retained * 1024 * 1024),
+    )
+    Handler.limiter = RateLimiter(args.rate / 60, args.burst)
+    Handler.max_upload = int(args.max_upload * 1024 * 1024)
+    Handler.compression = Compression(
+        make_codecs(args.codecs.split(","), args.gzip_level), args.min_compress
+    )
+    Handler.static = load_static(WEB_DIR, Handler.compression)
+    with ThreadingHTTPServer(("0.0.0.0", port), Handler) as serv:
         print(f"Pdf2Json (http://{host}:{port})")
         try:
             serv.serve_forever()
         except KeyboardInterrupt:
             pass
+
+
+if __name__ == "__main__":
+    main()